@@ -3,6 +3,17 @@ import itertools
 
 class Sentence():
 
+    # Sentences are immutable trees: no instance __dict__, children are kept
+    # in tuples and each node caches its hash. Copying and pickling rebuild
+    # a node from its constructor arguments, through __reduce__.
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -44,14 +55,20 @@ class Sentence():
 
 class Symbol(Sentence):
 
+    __slots__ = ("name", "_hash")
+
     def __init__(self, name):
-        self.name = name
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "_hash", hash(("symbol", name)))
 
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -69,16 +86,57 @@ class Symbol(Sentence):
         return {self.name}
 
 
+class Constant(Sentence):
+
+    __slots__ = ("value", "_hash")
+
+    def __init__(self, value):
+        object.__setattr__(self, "value", bool(value))
+        object.__setattr__(self, "_hash", hash(("constant", bool(value))))
+
+    def __eq__(self, other):
+        return isinstance(other, Constant) and self.value == other.value
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (Constant, (self.value,))
+
+    def __repr__(self):
+        return "TRUE" if self.value else "FALSE"
+
+    def evaluate(self, model):
+        return self.value
+
+    def formula(self):
+        return "⊤" if self.value else "⊥"
+
+    def symbols(self):
+        return set()
+
+
+TRUE = Constant(True)
+FALSE = Constant(False)
+
+
 class Not(Sentence):
+
+    __slots__ = ("operand", "_hash")
+
     def __init__(self, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        object.__setattr__(self, "operand", operand)
+        object.__setattr__(self, "_hash", hash(("not", hash(operand))))
 
     def __eq__(self, other):
         return isinstance(other, Not) and self.operand == other.operand
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -94,18 +152,26 @@ class Not(Sentence):
 
 
 class And(Sentence):
+
+    __slots__ = ("conjuncts", "_hash")
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        object.__setattr__(self, "conjuncts", tuple(conjuncts))
+        object.__setattr__(
+            self, "_hash",
+            hash(("and", tuple(hash(conjunct) for conjunct in conjuncts)))
+        )
 
     def __eq__(self, other):
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return self._hash
+
+    def __reduce__(self):
+        return (And, self.conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +180,8 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """Returns a new And with `conjunct` appended; self is unchanged."""
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -127,22 +193,30 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set().union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
 
 class Or(Sentence):
+
+    __slots__ = ("disjuncts", "_hash")
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        object.__setattr__(self, "disjuncts", tuple(disjuncts))
+        object.__setattr__(
+            self, "_hash",
+            hash(("or", tuple(hash(disjunct) for disjunct in disjuncts)))
+        )
 
     def __eq__(self, other):
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
+
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -158,15 +232,22 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set().union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
 
 class Implication(Sentence):
+
+    __slots__ = ("antecedent", "consequent", "_hash")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        object.__setattr__(self, "antecedent", antecedent)
+        object.__setattr__(self, "consequent", consequent)
+        object.__setattr__(
+            self, "_hash",
+            hash(("implies", hash(antecedent), hash(consequent)))
+        )
 
     def __eq__(self, other):
         return (isinstance(other, Implication)
@@ -174,7 +255,10 @@ class Implication(Sentence):
                 and self.consequent == other.consequent)
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -193,11 +277,17 @@ class Implication(Sentence):
 
 
 class Biconditional(Sentence):
+
+    __slots__ = ("left", "right", "_hash")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        object.__setattr__(self, "left", left)
+        object.__setattr__(self, "right", right)
+        object.__setattr__(
+            self, "_hash", hash(("biconditional", hash(left), hash(right)))
+        )
 
     def __eq__(self, other):
         return (isinstance(other, Biconditional)
@@ -205,16 +295,17 @@ class Biconditional(Sentence):
                 and self.right == other.right)
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        # Each side is evaluated exactly once.
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
@@ -225,8 +316,139 @@ class Biconditional(Sentence):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def simplify(sentence, model=None):
+    """
+    Returns an equivalent, smaller sentence.
+
+    Symbols assigned in `model` are replaced by constants, constants are
+    folded away, nested And/Or are flattened, duplicate operands removed and
+    double negations eliminated.
+    """
+    model = model or dict()
+
+    if isinstance(sentence, Symbol):
+        if sentence.name in model:
+            return TRUE if model[sentence.name] else FALSE
+        return sentence
+
+    elif isinstance(sentence, Constant):
+        return sentence
+
+    elif isinstance(sentence, Not):
+        operand = simplify(sentence.operand, model)
+        if isinstance(operand, Constant):
+            return FALSE if operand.value else TRUE
+        if isinstance(operand, Not):
+            return operand.operand
+        return Not(operand)
+
+    elif isinstance(sentence, (And, Or)):
+        is_and = isinstance(sentence, And)
+        # The value that decides the whole sentence, and the one that is
+        # neutral and can be dropped.
+        absorbing, neutral = (FALSE, TRUE) if is_and else (TRUE, FALSE)
+        children = sentence.conjuncts if is_and else sentence.disjuncts
+
+        operands = dict()
+        for child in children:
+            child = simplify(child, model)
+            if child == absorbing:
+                return absorbing
+            if child == neutral:
+                continue
+            # Flatten nested sentences of the same kind.
+            if type(child) is type(sentence):
+                nested = child.conjuncts if is_and else child.disjuncts
+            else:
+                nested = (child,)
+            for operand in nested:
+                # Complementary operands decide the whole sentence.
+                complement = (operand.operand if isinstance(operand, Not)
+                              else Not(operand))
+                if complement in operands:
+                    return absorbing
+                operands[operand] = None
+
+        if not operands:
+            return neutral
+        if len(operands) == 1:
+            return next(iter(operands))
+        return And(*operands) if is_and else Or(*operands)
+
+    elif isinstance(sentence, Implication):
+        antecedent = simplify(sentence.antecedent, model)
+        consequent = simplify(sentence.consequent, model)
+        if antecedent == FALSE or consequent == TRUE:
+            return TRUE
+        if antecedent == TRUE:
+            return consequent
+        if consequent == FALSE:
+            return simplify(Not(antecedent))
+        if antecedent == consequent:
+            return TRUE
+        return Implication(antecedent, consequent)
+
+    elif isinstance(sentence, Biconditional):
+        left = simplify(sentence.left, model)
+        right = simplify(sentence.right, model)
+        if isinstance(left, Constant):
+            left, right = right, left
+        if isinstance(right, Constant):
+            return left if right.value else simplify(Not(left))
+        if left == right:
+            return TRUE
+        if left == Not(right) or right == Not(left):
+            return FALSE
+        return Biconditional(left, right)
+
+    raise TypeError("must be a logical sentence")
+
+
+def unit_propagate(knowledge):
+    """
+    Splits a knowledge base into the facts it asserts directly and the
+    simplified remainder.
+
+    Returns a tuple (facts, residual) where `facts` maps symbol names to
+    their forced truth values and `residual` is the rest of the knowledge
+    with those facts substituted in. `knowledge` is equivalent to the facts
+    together with `residual`; a residual of FALSE means it is unsatisfiable.
+    """
+    facts = dict()
+    residual = simplify(knowledge)
+    while True:
+        conjuncts = (residual.conjuncts if isinstance(residual, And)
+                     else (residual,))
+        units = dict()
+        for conjunct in conjuncts:
+            if isinstance(conjunct, Symbol):
+                units[conjunct.name] = True
+            elif (isinstance(conjunct, Not)
+                  and isinstance(conjunct.operand, Symbol)):
+                units[conjunct.operand.name] = False
+        if not units:
+            return facts, residual
+        facts.update(units)
+        residual = simplify(residual, facts)
+
+
+def model_check(knowledge, query, simplify_first=False):
+    """
+    Checks if knowledge base entails query.
+
+    With `simplify_first`, facts asserted by the knowledge base are
+    propagated and both sentences simplified before enumerating models,
+    which removes the propagated symbols from the enumeration.
+    """
+    if simplify_first:
+        facts, knowledge = unit_propagate(knowledge)
+
+        # An unsatisfiable knowledge base entails everything.
+        if knowledge == FALSE:
+            return True
+        query = simplify(query, facts)
+        if query == TRUE:
+            return True
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
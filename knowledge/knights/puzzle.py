@@ -130,7 +130,7 @@ def main():
             print("    Not yet implemented.")
         else:
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if model_check(knowledge, symbol, simplify_first=True):
                     print(f"    {symbol}")
 
 
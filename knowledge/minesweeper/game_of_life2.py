@@ -1,30 +1,24 @@
+import numpy as np
 import pygame
 import sys
 import time
 
-HEIGHT = 8
-WIDTH = 8
-MINES = 8
+from life import Life
+
+HEIGHT = 40
+WIDTH = 40
 
 # Colors.
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
 WHITE = (255, 255, 255)
 
-
-class Life(object):
-    def __init__(self) -> None:
-        self.board = [[False] * WIDTH] * HEIGHT
-
-
 # Create game.
 pygame.init()
 size = width, height = 600, 600
 screen = pygame.display.set_mode(size)
-game = Life()
-
-# Default font.
-font = pygame.font.Font(None, 26)
+game = Life(HEIGHT, WIDTH)
+running = False
 
 # Compute board size.
 BOARD_PADDING = 20
@@ -33,39 +27,39 @@ board_height = height - (BOARD_PADDING * 2)
 cell_size = int(min(board_width / WIDTH, board_height / HEIGHT))
 board_origin = (BOARD_PADDING, BOARD_PADDING)
 
+# Limit how often the board is stepped and redrawn.
+FPS = 10
+clock = pygame.time.Clock()
+
 while True:
-    # Check if game quit
+    # Check if game quit, or space pressed to start or pause.
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             sys.exit()
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            running = not running
 
-    screen.fill(BLACK)
-
-    # Draw board.
-    cells = []
-    for i, board_row in enumerate(game.board):
-        row = []
-        for j, board_cell in enumerate(board_row):
+    # Check for a right-click or left-click to toggle a cell.
+    left, _, right = pygame.mouse.get_pressed()
+    if right == 1 or left == 1:
+        x, y = pygame.mouse.get_pos()
+        i = (y - board_origin[1]) // cell_size
+        j = (x - board_origin[0]) // cell_size
+        if 0 <= i < HEIGHT and 0 <= j < WIDTH:
+            game.toggle((i, j))
+            time.sleep(0.2)
 
-            # Draw rectangle for cell.
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size,
-                cell_size,
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
+    if running:
+        game.step()
 
-            row.append(rect)
-        cells.append(row)
+    # Draw board: one pixel per cell, scaled up to the cell size.
+    colors = np.where(game.board.T[:, :, np.newaxis], WHITE, GRAY)
+    cells = pygame.surfarray.make_surface(colors.astype(np.uint8))
+    screen.fill(BLACK)
+    screen.blit(
+        pygame.transform.scale(cells, (WIDTH * cell_size, HEIGHT * cell_size)),
+        board_origin,
+    )
 
-    left, _, right = pygame.mouse.get_pressed()
-    # Check for a right-click or left-click
-    if right == 1 or left == 1:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse):
-                    game.board
-                    time.sleep(0.2)
+    pygame.display.flip()
+    clock.tick(FPS)
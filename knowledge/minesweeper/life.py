@@ -0,0 +1,147 @@
+import argparse
+import time
+
+from collections import Counter
+
+import numpy as np
+
+
+class Life:
+    """
+    Conway's Game of Life on a bounded board, stored as a NumPy array of
+    booleans. Cells beyond the edges are always dead.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.board = np.zeros((height, width), dtype=bool)
+        self.generation = 0
+
+    def randomize(self, density=0.3, seed=None):
+        """
+        Makes each cell alive with probability `density`.
+        """
+        rng = np.random.default_rng(seed)
+        self.board = rng.random((self.height, self.width)) < density
+
+    def toggle(self, cell):
+        """
+        Flips a cell between alive and dead.
+        """
+        i, j = cell
+        self.board[i, j] = not self.board[i, j]
+
+    def population(self):
+        """
+        Returns the number of live cells.
+        """
+        return int(self.board.sum())
+
+    def step(self):
+        """
+        Advances the board by one generation.
+        """
+        # Sum the eight shifted copies of the board, padded with dead cells
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        neighbors = (
+            padded[:-2, :-2] + padded[:-2, 1:-1] + padded[:-2, 2:]
+            + padded[1:-1, :-2] + padded[1:-1, 2:]
+            + padded[2:, :-2] + padded[2:, 1:-1] + padded[2:, 2:]
+        )
+
+        # A cell lives with three neighbors, or two if already alive
+        self.board = (neighbors == 3) | (self.board & (neighbors == 2))
+        self.generation += 1
+
+
+class SparseLife:
+    """
+    Conway's Game of Life on an unbounded board, storing only the set of
+    live cells. Suited to huge universes that are mostly empty, where each
+    step costs time proportional to the population rather than the area.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = set(cells)
+        self.generation = 0
+
+    def toggle(self, cell):
+        """
+        Flips a cell between alive and dead.
+        """
+        if cell in self.cells:
+            self.cells.remove(cell)
+        else:
+            self.cells.add(cell)
+
+    def population(self):
+        """
+        Returns the number of live cells.
+        """
+        return len(self.cells)
+
+    def step(self):
+        """
+        Advances the board by one generation.
+        """
+        # Count, for every cell next to a live one, its live neighbors
+        neighbors = Counter(
+            (i + di, j + dj)
+            for i, j in self.cells
+            for di in (-1, 0, 1)
+            for dj in (-1, 0, 1)
+            if di or dj
+        )
+
+        # A cell lives with three neighbors, or two if already alive
+        self.cells = {
+            cell
+            for cell, count in neighbors.items()
+            if count == 3 or (count == 2 and cell in self.cells)
+        }
+        self.generation += 1
+
+
+def benchmark(life, generations):
+    """
+    Steps `life` for a number of generations and returns the generations
+    computed per second.
+    """
+    start = time.perf_counter()
+    for _ in range(generations):
+        life.step()
+    return generations / (time.perf_counter() - start)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Measure how fast the Game of Life engines run."
+    )
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("-g", "--generations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sparse", action="store_true")
+    args = parser.parse_args()
+
+    life = Life(args.size, args.size)
+    life.randomize(args.density, args.seed)
+    if args.sparse:
+        life = SparseLife(
+            (int(i), int(j)) for i, j in zip(*np.nonzero(life.board))
+        )
+
+    population = life.population()
+    rate = benchmark(life, args.generations)
+
+    # Print results
+    engine = "sparse" if args.sparse else "dense"
+    print(f"{engine} {args.size}x{args.size}, density {args.density}")
+    print(f"  Population: {population} -> {life.population()}")
+    print(f"  Generations per second: {rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,53 @@
 import itertools
+import math
 import random
 
+from collections import deque
+from functools import lru_cache
+
+# Search nodes allowed when enumerating the mine configurations of one
+# frontier component before falling back to a local estimate
+MAX_ENUMERATION_NODES = 200000
+
+
+def neighbor_indices(index, height, width):
+    """
+    Returns a tuple of the indices (i * width + j) of the cells within one
+    row and column of the cell at `index`, not including the cell itself.
+
+    Computed each time rather than cached, since a large board has far
+    more cells than any cache would hold.
+    """
+    i, j = divmod(index, width)
+    if 0 < i < height - 1 and 0 < j < width - 1:
+        above = index - width
+        below = index + width
+        return (
+            above - 1, above, above + 1,
+            index - 1, index + 1,
+            below - 1, below, below + 1,
+        )
+    return tuple(
+        row * width + col
+        for row in range(max(i - 1, 0), min(i + 2, height))
+        for col in range(max(j - 1, 0), min(j + 2, width))
+        if row != i or col != j
+    )
+
 
 class Minesweeper:
     """
     Minesweeper game representation
+
+    The board is stored flat, cell (i, j) at index i * width + j: `board`
+    flags the mines and `counts` holds every cell's number of nearby mines,
+    computed once when the mines are placed.
+
+    If `first_click` is given, no mine is placed on that cell or, board
+    size permitting, around it, so that the first move is always safe.
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    def __init__(self, height=8, width=8, mines=8, first_click=None):
 
         # Set initial width, height, and number of mines
         self.height = height
@@ -15,24 +55,43 @@ class Minesweeper:
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        self.board = bytearray(height * width)
+
+        # Keep the first click, and its neighbors if possible, free of mines
+        excluded = set()
+        if first_click is not None:
+            index = first_click[0] * width + first_click[1]
+            excluded = {index, *neighbor_indices(index, height, width)}
+            if height * width - len(excluded) < mines:
+                excluded = {index}
+        if height * width - len(excluded) < mines:
+            raise ValueError("too many mines for the board")
+
+        # Add mines randomly, sampling cells without replacement; the sample
+        # is in random order, so its first non-excluded cells are uniform
+        for index in random.sample(range(height * width), mines + len(excluded)):
+            if len(self.mines) == mines:
+                break
+            if index not in excluded:
+                self.mines.add(divmod(index, width))
+                self.board[index] = True
+
+        # Count nearby mines for every cell, by adding each mine to the
+        # counts of the cells around it
+        self.counts = bytearray(height * width)
+        for i, j in self.mines:
+            for row in range(max(i - 1, 0), min(i + 2, height)):
+                offset = row * width
+                for col in range(max(j - 1, 0), min(j + 2, width)):
+                    self.counts[offset + col] += 1
+            self.counts[i * width + j] -= 1
 
         # At first, player has found no mines
         self.mines_found = set()
 
+        # Cells revealed so far
+        self.revealed = bytearray(height * width)
+
     def print(self):
         """
         Prints a text-based representation
@@ -41,7 +100,7 @@ class Minesweeper:
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i * self.width + j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -50,7 +109,7 @@ class Minesweeper:
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i * self.width + j])
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +117,36 @@ class Minesweeper:
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        return self.counts[i * self.width + j]
+
+    def reveal(self, cell):
+        """
+        Reveals a safe cell, flooding out from it through every connected
+        cell with no nearby mines, as a player's click would.
+
+        Returns a list of (cell, count) pairs for the newly revealed cells,
+        with count the number of mines nearby.
+        """
+        start = cell[0] * self.width + cell[1]
+        if self.board[start] or self.revealed[start]:
+            return []
+
+        revealed = []
+        self.revealed[start] = True
+        frontier = [start]
+        while frontier:
+            index = frontier.pop()
+            count = self.counts[index]
+            revealed.append((divmod(index, self.width), count))
+            if count:
+                continue
+            # no mines nearby: every neighbor is safe to reveal too
+            for neighbor in neighbor_indices(index, self.height, self.width):
+                if not self.revealed[neighbor]:
+                    self.revealed[neighbor] = True
+                    frontier.append(neighbor)
+        return revealed
 
     def won(self):
         """
@@ -139,17 +210,207 @@ class Sentence:
             self.cells.discard(cell)
 
 
+@lru_cache(maxsize=4096)
+def enumerate_component(sentences):
+    """
+    Enumerates the mine configurations consistent with a component of
+    sentences, given as a sorted tuple of (mask, count) pairs.
+
+    Returns a tuple (configurations, cell_mines) where `configurations`
+    maps a number of mines k to the number of consistent configurations
+    placing k mines in the component, and `cell_mines` maps k to a dict
+    from cell index to the number of those configurations with a mine on
+    that cell. Returns None if the search exceeds MAX_ENUMERATION_NODES.
+    """
+    # cells appearing in exactly the same sentences are interchangeable, so
+    # only the number of mines in each such group is enumerated; groups are
+    # ordered sentence by sentence, so that constraints close early
+    groups = dict()
+    for mask, _ in sentences:
+        for index in MinesweeperAI.mask_indices(mask):
+            if index not in groups:
+                groups[index] = tuple(
+                    c for c, (other, _) in enumerate(sentences)
+                    if other >> index & 1
+                )
+    classes = dict()
+    for index, constraints in groups.items():
+        classes.setdefault(constraints, []).append(index)
+    classes = list(classes.items())
+
+    # mines still needed and cells still unassigned, per sentence
+    need = [count for _, count in sentences]
+    left = [mask.bit_count() for mask, _ in sentences]
+
+    configurations = dict()
+    class_mines = dict()
+    placed = []
+    nodes = 0
+
+    def search(v, ways):
+        nonlocal nodes
+        nodes += 1
+        if nodes > MAX_ENUMERATION_NODES:
+            return False
+        if v == len(classes):
+            k = sum(placed)
+            configurations[k] = configurations.get(k, 0) + ways
+            counts = class_mines.setdefault(k, [0] * len(classes))
+            for c, mines in enumerate(placed):
+                # configurations with a mine on any given cell of the class
+                counts[c] += ways * mines // len(classes[c][1])
+            return True
+
+        cons, cells = classes[v]
+        size = len(cells)
+        for c in cons:
+            left[c] -= size
+
+        # try every number of mines that keeps each sentence satisfiable
+        low = max(max(need[c] - left[c] for c in cons), 0)
+        high = min(min(need[c] for c in cons), size)
+        complete = True
+        for mines in range(low, high + 1):
+            for c in cons:
+                need[c] -= mines
+            placed.append(mines)
+            complete = search(v + 1, ways * math.comb(size, mines))
+            placed.pop()
+            for c in cons:
+                need[c] += mines
+            if not complete:
+                break
+
+        for c in cons:
+            left[c] += size
+        return complete
+
+    if not search(0, 1):
+        return None
+
+    cell_mines = dict()
+    for k, counts in class_mines.items():
+        cell_mines[k] = {
+            index: counts[c]
+            for c, (_, cells) in enumerate(classes)
+            for index in cells
+        }
+    return configurations, cell_mines
+
+
+@lru_cache(maxsize=4096)
+def solve_component(sentences):
+    """
+    Finds the cells forced to be mines or safe by a component of sentences,
+    given as a sorted tuple of (mask, count) pairs, including deductions
+    that combine any number of sentences.
+
+    The sentences are treated as a 0/1 linear system and reduced by
+    Gaussian elimination; a reduced row whose count equals the largest or
+    smallest value its cells can sum to fixes all of them. If elimination
+    finds nothing, the component's configurations are enumerated instead.
+
+    Returns a tuple (mines, safes) of bitmasks.
+    """
+    cells = sorted(
+        set().union(*(MinesweeperAI.mask_indices(mask) for mask, _ in sentences))
+    )
+    rows = [
+        [mask >> index & 1 for index in cells] + [count]
+        for mask, count in sentences
+    ]
+
+    # reduce to row echelon form, keeping integer coefficients
+    pivot_row = 0
+    for column in range(len(cells)):
+        pivot = next(
+            (r for r in range(pivot_row, len(rows)) if rows[r][column]), None
+        )
+        if pivot is None:
+            continue
+        rows[pivot_row], rows[pivot] = rows[pivot], rows[pivot_row]
+        top = rows[pivot_row]
+        for r in range(len(rows)):
+            factor = rows[r][column]
+            if r == pivot_row or not factor:
+                continue
+            row = [
+                a * top[column] - b * factor for a, b in zip(rows[r], top)
+            ]
+            divisor = math.gcd(*row)
+            rows[r] = [a // divisor for a in row] if divisor > 1 else row
+        pivot_row += 1
+        if pivot_row == len(rows):
+            break
+
+    mines = 0
+    safes = 0
+    for row in rows:
+        *coefficients, count = row
+        positive = sum(a for a in coefficients if a > 0)
+        negative = sum(a for a in coefficients if a < 0)
+        # at a bound, cells with positive coefficients all take one value
+        # and cells with negative coefficients the other
+        if count == positive:
+            mine_sign = 1
+        elif count == negative:
+            mine_sign = -1
+        else:
+            continue
+        for index, a in zip(cells, coefficients):
+            if a * mine_sign > 0:
+                mines |= 1 << index
+            elif a:
+                safes |= 1 << index
+    if mines or safes:
+        return mines, safes
+
+    # fall back to enumerating the component, if it is small enough
+    result = enumerate_component(sentences)
+    if result is None:
+        return 0, 0
+    configurations, cell_mines = result
+    total = sum(configurations.values())
+    if not total:
+        return 0, 0
+    for index in cells:
+        n = sum(counts.get(index, 0) for counts in cell_mines.values())
+        if n == 0:
+            safes |= 1 << index
+        elif n == total:
+            mines |= 1 << index
+    return mines, safes
+
+
 class MinesweeperAI:
     """
     Minesweeper game player
+
+    Knowledge is stored as integer bitmasks over cell indices
+    (i * width + j): `self.sentences` maps a mask of unknown cells to the
+    number of mines among them, and `self.cell_sentences` indexes, for each
+    cell, the masks of the sentences mentioning it. New sentences are queued
+    in `self.pending` until `propagate` has drawn conclusions from them.
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, solver="subset"):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # "subset" infers from pairs of sentences where one contains the
+        # other; "linear" also solves each frontier component as a whole
+        if solver not in ("subset", "linear"):
+            raise ValueError(f"unknown solver {solver!r}")
+        self.solver = solver
+
+        # Total number of mines on the board, assuming the default board's
+        # density if it is not known
+        self.total_mines = (
+            mines if mines is not None else (height * width) // 8
+        )
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -157,8 +418,77 @@ class MinesweeperAI:
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, as {mask: count}
+        self.sentences = dict()
+
+        # Index from a cell index to the masks of sentences containing it
+        self.cell_sentences = dict()
+
+        # Sentences added or changed since inference last ran
+        self.pending = deque()
+
+        # Cells not yet chosen and not known to be mines
+        self.unplayed = {
+            (i, j) for i in range(height) for j in range(width)
+        }
+
+    @property
+    def knowledge(self):
+        """
+        List of sentences about the game known to be true.
+        """
+        return [
+            Sentence(self.mask_cells(mask), count)
+            for mask, count in self.sentences.items()
+        ]
+
+    def cell_index(self, cell):
+        """
+        Returns the bit index of a cell.
+        """
+        i, j = cell
+        return i * self.width + j
+
+    def mask_cells(self, mask):
+        """
+        Returns the set of cells in a bitmask.
+        """
+        return {divmod(index, self.width) for index in self.mask_indices(mask)}
+
+    @staticmethod
+    def mask_indices(mask):
+        """
+        Yields the bit indices set in a bitmask.
+        """
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def add_sentence(self, mask, count):
+        """
+        Adds a sentence to the knowledge base and the cell index.
+        Returns True if the sentence was not already known.
+        """
+        if not mask or mask in self.sentences:
+            return False
+        self.sentences[mask] = count
+        self.pending.append(mask)
+        for index in self.mask_indices(mask):
+            self.cell_sentences.setdefault(index, set()).add(mask)
+        return True
+
+    def remove_sentence(self, mask):
+        """
+        Removes a sentence from the knowledge base and the cell index.
+        """
+        count = self.sentences.pop(mask)
+        for index in self.mask_indices(mask):
+            masks = self.cell_sentences[index]
+            masks.discard(mask)
+            if not masks:
+                del self.cell_sentences[index]
+        return count
 
     def mark_mine(self, cell):
         """
@@ -166,8 +496,12 @@ class MinesweeperAI:
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.unplayed.discard(cell)
+        index = self.cell_index(cell)
+        bit = 1 << index
+        for mask in list(self.cell_sentences.get(index, ())):
+            count = self.remove_sentence(mask)
+            self.add_sentence(mask & ~bit, count - 1)
 
     def mark_safe(self, cell):
         """
@@ -175,8 +509,11 @@ class MinesweeperAI:
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        index = self.cell_index(cell)
+        bit = 1 << index
+        for mask in list(self.cell_sentences.get(index, ())):
+            count = self.remove_sentence(mask)
+            self.add_sentence(mask & ~bit, count)
 
     def add_knowledge(self, cell, count):
         """
@@ -195,132 +532,161 @@ class MinesweeperAI:
         """
         # 1
         self.moves_made.add(cell)
+        self.unplayed.discard(cell)
 
         # 2
         self.mark_safe(cell)
 
         # 3
-        cells = self.adjacent_cells(cell)
-        # if there are known mines, update the count to reflect uncertainty
-        count -= len(cells.intersection(self.mines))
-        # ignore known mines and safe cells
-        cells.difference_update(self.mines)
-        cells.difference_update(self.safes)
-        new_info = Sentence(cells, count)
-        if new_info not in self.knowledge:
-            self.knowledge.append(new_info)
+        self.add_sentence(*self.neighbor_sentence(cell, count))
 
         # 4 & 5
-        new_info = True
-        while new_info:
-            new_info = False
-            # mark cells as safe or as mines
-            if self.update_sentences():
-                new_info = True
-            # create new inferences
-            if self.infer_sentences():
-                new_info = True
-
-    def infer_sentences(self):
-        """
-        Sentences are inferred using the tactics discussed in the problem definition
-        background.
-        """
-        inferred_sentences = []
-        inferred_safes = set()
-
-        for i, sentence_a in enumerate(self.knowledge):
-            for sentence_b in self.knowledge[i + 1 :]:
-                # sentences being the same needs to be skipped
-                if sentence_a == sentence_b:
+        self.propagate()
+
+    def add_knowledge_many(self, observations):
+        """
+        Adds several observations at once, such as the cells revealed
+        together by a flood fill or the moves of a saved game, and draws
+        conclusions from them a single time. `observations` is a dict or
+        an iterable of (cell, count) pairs; the resulting mines and safes
+        are the same as adding each observation with `add_knowledge`.
+        """
+        if isinstance(observations, dict):
+            observations = observations.items()
+        observations = {
+            cell: count
+            for cell, count in observations
+            if cell not in self.moves_made
+        }
+
+        # mark every cell first, so that no sentence mentions a cell
+        # revealed in the same batch
+        for cell in observations:
+            self.moves_made.add(cell)
+            self.unplayed.discard(cell)
+            self.mark_safe(cell)
+
+        for cell, count in observations.items():
+            self.add_sentence(*self.neighbor_sentence(cell, count))
+
+        self.propagate()
+
+    def neighbor_sentence(self, cell, count):
+        """
+        Returns the (mask, count) sentence stating that `count` mines are
+        among the neighbors of `cell` not yet known to be safe or mines.
+        """
+        mask = 0
+        for index in neighbor_indices(
+            self.cell_index(cell), self.height, self.width
+        ):
+            adjacent = divmod(index, self.width)
+            # if there are known mines, update the count to reflect uncertainty
+            if adjacent in self.mines:
+                count -= 1
+            # ignore known mines and safe cells
+            elif adjacent not in self.safes:
+                mask |= 1 << index
+        return mask, count
+
+    def propagate(self):
+        """
+        Draws conclusions from the sentences waiting in `self.pending` until
+        none are left. Marking a cell or inferring a sentence queues only
+        the sentences it produces, so the work done is proportional to what
+        changed rather than to the size of the knowledge base.
+
+        With the linear solver, each frontier component is then solved as
+        a whole, and propagation resumes if that marks any cells.
+        """
+        while True:
+            while self.pending:
+                mask = self.pending.popleft()
+                # the sentence was resolved or reduced since it was queued
+                if mask not in self.sentences:
                     continue
-                # sentence a is a subset of the info in sentence b
-                if sentence_a.cells.issubset(sentence_b.cells):
-                    inferred_sentence = Sentence(
-                        sentence_b.cells.difference(sentence_a.cells),
-                        sentence_b.count - sentence_a.count,
-                    )
-                    if self.new_sentence(inferred_sentence):
-                        inferred_sentences.append(inferred_sentence)
-                        inferred_safes.update(inferred_sentence.known_safes())
-                # sentence b is a subset of the info in sentence a
-                if sentence_b.cells.issubset(sentence_a.cells):
-                    inferred_sentence = Sentence(
-                        sentence_a.cells.difference(sentence_b.cells),
-                        sentence_a.count - sentence_b.count,
-                    )
-                    if self.new_sentence(inferred_sentence):
-                        inferred_sentences.append(inferred_sentence)
-                        inferred_safes.update(inferred_sentence.known_safes())
-
-        for sentence in inferred_sentences:
-            if sentence not in self.knowledge:
-                self.knowledge.append(sentence)
-
-        for safe in inferred_safes:
-            self.mark_safe(safe)
-
-        # return True if updates were made
-        return len(inferred_sentences) > 0
-
-    def new_sentence(self, sentence):
-        """
-        Checks to see if a sentence has new information not in knowledge.
-        """
-        for known_sentence in self.knowledge:
-            if (
-                sentence.cells == known_sentence.cells
-                and sentence.count == known_sentence.count
-            ):
-                return False
+                count = self.sentences[mask]
 
-    def update_sentences(self):
-        """
-        Cells are marked as safe or as mines based on the sentences in self.knowledge.
-        """
-        resolved_sentences = []
-        discovered_mines = set()
-        discovered_safes = set()
+                # mark cells as safe or as mines
+                if count == 0:
+                    for cell in self.mask_cells(mask):
+                        self.mark_safe(cell)
+                elif mask.bit_count() == count:
+                    for cell in self.mask_cells(mask):
+                        self.mark_mine(cell)
 
-        for sentence in self.knowledge:
-            # extract data
-            mines = sentence.known_mines()
-            safes = sentence.known_safes()
+                # create new inferences
+                else:
+                    self.infer_sentences(mask)
 
-            # the sentence is useless
-            if len(sentence.cells) == 0:
-                resolved_sentences.append(sentence)
-            elif mines:
-                discovered_mines.update(mines)
-                resolved_sentences.append(sentence)
-            elif safes:
-                discovered_safes.update(safes)
-                resolved_sentences.append(sentence)
+            if self.solver != "linear" or not self.solve_components():
+                return
 
-        for sentence in resolved_sentences:
-            self.knowledge.remove(sentence)
+    def solve_components(self):
+        """
+        Marks the cells forced by each frontier component as a whole.
+        Results are cached per component, so components unchanged since
+        the last move are not solved again.
 
-        for mine in discovered_mines:
-            self.mark_mine(mine)
+        Returns True if any cell was marked.
+        """
+        mines = 0
+        safes = 0
+        for component in self.frontier_components():
+            component_mines, component_safes = solve_component(component)
+            mines |= component_mines
+            safes |= component_safes
 
-        for safe in discovered_safes:
-            self.mark_safe(safe)
+        for cell in self.mask_cells(mines):
+            self.mark_mine(cell)
+        for cell in self.mask_cells(safes):
+            self.mark_safe(cell)
 
-        # return True if updates were made
-        return len(discovered_mines) > 0 or len(discovered_safes) > 0
+        return mines != 0 or safes != 0
+
+    def infer_sentences(self, mask):
+        """
+        Sentences are inferred using the tactics discussed in the problem definition
+        background: if the cells of sentence a are a subset of those of
+        sentence b, then b - a holds with count b.count - a.count. The
+        sentence `mask` is only compared with sentences sharing a cell with
+        it, found through the cell index.
+        """
+        count = self.sentences[mask]
+        overlapping = set()
+        for index in self.mask_indices(mask):
+            overlapping.update(self.cell_sentences[index])
+        overlapping.discard(mask)
+
+        inferred_sentences = dict()
+        for other in overlapping:
+            # this sentence is a subset of the info in the other
+            if mask & other == mask:
+                inferred_sentences[other ^ mask] = self.sentences[other] - count
+            # the other sentence is a subset of the info in this one
+            elif mask & other == other:
+                inferred_sentences[mask ^ other] = count - self.sentences[other]
+
+        for inferred_mask, inferred_count in inferred_sentences.items():
+            if self.new_sentence(inferred_mask):
+                self.add_sentence(inferred_mask, inferred_count)
+
+    def new_sentence(self, mask):
+        """
+        Checks to see if a sentence has new information not in knowledge.
+        """
+        return mask not in self.sentences
 
     def adjacent_cells(self, cell):
         """
         Finds all adjacent valid cells on the board.
         """
-        adjacent = set()
-        i, j = cell
-        for row in range(i - 1, i + 2):
-            for col in range(j - 1, j + 2):
-                if 0 <= row < self.height and 0 <= col < self.width:
-                    adjacent.add((row, col))
-        adjacent.discard(cell)
-        return adjacent
+        return {
+            divmod(index, self.width)
+            for index in neighbor_indices(
+                self.cell_index(cell), self.height, self.width
+            )
+        }
 
     def make_safe_move(self):
         """
@@ -342,18 +708,142 @@ class MinesweeperAI:
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        picking the one least likely to be a mine, and randomly among
+        equally likely cells.
         """
-        # generate all possible moves
-        moves = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                moves.add((i, j))
-        valid_moves = moves.difference(self.mines, self.moves_made)
+        valid_moves = self.unplayed
 
-        if len(valid_moves) > 0:
-            return valid_moves.pop()
-        else:
+        if len(valid_moves) == 0:
             return None
+
+        probabilities = self.mine_probabilities()
+        lowest = min(probabilities[move] for move in valid_moves)
+        return random.choice(
+            [
+                move
+                for move in valid_moves
+                if probabilities[move] <= lowest + 1e-12
+            ]
+        )
+
+    def frontier_components(self):
+        """
+        Splits the knowledge base into groups of sentences that share no
+        cells with each other, returned as sorted tuples of (mask, count).
+        """
+        components = []
+        visited = set()
+        for start in self.sentences:
+            if start in visited:
+                continue
+            visited.add(start)
+            component = []
+            stack = [start]
+            while stack:
+                mask = stack.pop()
+                component.append((mask, self.sentences[mask]))
+                for index in self.mask_indices(mask):
+                    for other in self.cell_sentences[index]:
+                        if other not in visited:
+                            visited.add(other)
+                            stack.append(other)
+            components.append(tuple(sorted(component)))
+        return components
+
+    def mine_probabilities(self):
+        """
+        Returns a dict from every cell to the probability that it holds a
+        mine; cells known to be safe or mines map to 0 and 1.
+
+        The configurations of each frontier component are enumerated
+        separately, then weighted by the number of ways to place the rest
+        of the mines among the cells no sentence constrains.
+        """
+        unknown = self.unplayed.difference(self.safes)
+        probabilities = {cell: 0.0 for cell in self.safes}
+        probabilities.update({cell: 1.0 for cell in self.mines})
+
+        remaining_mines = self.total_mines - len(self.mines)
+        frontier = 0
+        exact = []
+        for component in self.frontier_components():
+            mask = 0
+            for sentence_mask, _ in component:
+                mask |= sentence_mask
+            frontier |= mask
+
+            result = enumerate_component(component)
+            if result is not None:
+                exact.append((mask, result))
+                continue
+
+            # too many configurations: estimate each cell from the most
+            # constraining sentence it appears in
+            estimates = dict()
+            for sentence_mask, count in component:
+                p = count / sentence_mask.bit_count()
+                for index in self.mask_indices(sentence_mask):
+                    estimates[index] = max(estimates.get(index, 0.0), p)
+            for index, p in estimates.items():
+                probabilities[divmod(index, self.width)] = p
+            remaining_mines -= round(sum(estimates.values()))
+
+        unconstrained = len(unknown) - frontier.bit_count()
+
+        def convolve(a, b):
+            result = dict()
+            for k1, n1 in a.items():
+                for k2, n2 in b.items():
+                    result[k1 + k2] = result.get(k1 + k2, 0) + n1 * n2
+            return result
+
+        def weight(k):
+            # ways to place the mines left over after k frontier mines
+            rest = remaining_mines - k
+            if rest < 0 or rest > unconstrained:
+                return 0
+            return math.comb(unconstrained, rest)
+
+        # number of frontier configurations by total frontier mines
+        distribution = {0: 1}
+        for _, (configurations, _) in exact:
+            distribution = convolve(distribution, configurations)
+        total = sum(n * weight(k) for k, n in distribution.items())
+
+        # the mine count is inconsistent with what is known: weight every
+        # configuration equally instead
+        if total == 0:
+            def weight(k):
+                return 1
+            total = sum(distribution.values())
+
+        for c, (mask, (_, cell_mines)) in enumerate(exact):
+            others = {0: 1}
+            for d, (_, (configurations, _)) in enumerate(exact):
+                if d != c:
+                    others = convolve(others, configurations)
+            mines = dict()
+            for k, counts in cell_mines.items():
+                ways = sum(n * weight(k + j) for j, n in others.items())
+                for index, n in counts.items():
+                    mines[index] = mines.get(index, 0) + n * ways
+            for index in self.mask_indices(mask):
+                probabilities[divmod(index, self.width)] = (
+                    mines.get(index, 0) / total
+                )
+
+        # cells no sentence constrains share the mines left expected
+        if unconstrained:
+            expected = sum(
+                n * weight(k) * (remaining_mines - k)
+                for k, n in distribution.items()
+            )
+            p = min(max(expected / total / unconstrained, 0.0), 1.0)
+            for cell in unknown:
+                if not frontier >> self.cell_index(cell) & 1:
+                    probabilities[cell] = p
+
+        return probabilities
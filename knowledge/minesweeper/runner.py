@@ -37,18 +37,89 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+# Pre-render cell contents: an empty cell and each nearby mine count
+blank = pygame.Surface((cell_size, cell_size))
+blank.fill(GRAY)
+pygame.draw.rect(blank, WHITE, blank.get_rect(), 3)
+numbers = [smallFont.render(str(n), True, BLACK) for n in range(9)]
+
+# The board is drawn onto its own surface, one changed cell at a time
+board = pygame.Surface((WIDTH * cell_size, HEIGHT * cell_size))
+
+# Buttons and their labels
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING,
+    (1 / 3) * height - 50,
+    (width / 3) - BOARD_PADDING * 2,
+    50,
+)
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING,
+    (1 / 3) * height + 20,
+    (width / 3) - BOARD_PADDING * 2,
+    50,
+)
+aiButtonText = mediumFont.render("AI Move", True, BLACK)
+resetButtonText = mediumFont.render("Reset", True, BLACK)
+statusTexts = {
+    text: mediumFont.render(text, True, WHITE) for text in ("", "Lost", "Won")
+}
+statusRect = pygame.Rect(
+    (2 / 3) * width, (2 / 3) * height - 30, width / 3, 60
+)
+
+# Limit how often the screen is redrawn
+FPS = 30
+clock = pygame.time.Clock()
+
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
 flags = set()
 lost = False
 
+# Cells to redraw, and whether the whole screen must be redrawn
+dirty = set()
+redraw = True
+status = None
+
 # Show instructions initially
 instructions = True
 
+
+def draw_cell(cell):
+    """
+    Draws a cell onto the board surface and returns its rectangle there.
+    """
+    i, j = cell
+    rect = pygame.Rect(j * cell_size, i * cell_size, cell_size, cell_size)
+    board.blit(blank, rect)
+
+    # Add a mine, flag, or number if needed
+    if lost and game.is_mine(cell):
+        board.blit(mine, rect)
+    elif cell in flags:
+        board.blit(flag, rect)
+    elif cell in revealed:
+        neighbors = numbers[game.nearby_mines(cell)]
+        board.blit(neighbors, neighbors.get_rect(center=rect.center))
+    return rect
+
+
+def cell_at(position):
+    """
+    Returns the board cell at a screen position, or None.
+    """
+    x = position[0] - board_origin[0]
+    y = position[1] - board_origin[1]
+    if 0 <= x < WIDTH * cell_size and 0 <= y < HEIGHT * cell_size:
+        return (y // cell_size, x // cell_size)
+    return None
+
+
 while True:
 
     # Check if game quit
@@ -56,10 +127,9 @@ while True:
         if event.type == pygame.QUIT:
             sys.exit()
 
-    screen.fill(BLACK)
-
     # Show game instructions
     if instructions:
+        screen.fill(BLACK)
 
         # Title
         title = largeFont.render("Play Minesweeper", True, WHITE)
@@ -96,88 +166,23 @@ while True:
                 time.sleep(0.3)
 
         pygame.display.flip()
+        clock.tick(FPS)
         continue
 
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size,
-                cell_size,
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))), True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING,
-        (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2,
-        50,
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING,
-        (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2,
-        50,
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
-
     move = None
 
     left, _, right = pygame.mouse.get_pressed()
 
     # Check for a right-click to toggle flagging
     if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
+        cell = cell_at(pygame.mouse.get_pos())
+        if cell is not None and cell not in revealed:
+            if cell in flags:
+                flags.remove(cell)
+            else:
+                flags.add(cell)
+            dirty.add(cell)
+            time.sleep(0.2)
 
     elif left == 1:
         mouse = pygame.mouse.get_pos()
@@ -188,10 +193,11 @@ while True:
             if move is None:
                 move = ai.make_random_move()
                 if move is None:  # the game is won when there are no random left
+                    dirty.update(flags, ai.mines)
                     flags = ai.mines.copy()
                     print("No moves left to make.")
                 else:
-                    print("No known safe moves, AI making random move.")
+                    print("No known safe moves, AI making best guess.")
             else:
                 print("AI making safe move.")
             time.sleep(0.2)
@@ -199,30 +205,68 @@ while True:
         # Reset game state
         elif resetButton.collidepoint(mouse):
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
             revealed = set()
             flags = set()
             lost = False
+            redraw = True
             continue
 
         # User-made move
         elif not lost:
-            for i in range(HEIGHT):
-                for j in range(WIDTH):
-                    if (
-                        cells[i][j].collidepoint(mouse)
-                        and (i, j) not in flags
-                        and (i, j) not in revealed
-                    ):
-                        move = (i, j)
+            cell = cell_at(mouse)
+            if cell is not None and cell not in flags and cell not in revealed:
+                move = cell
 
     # Make move and update AI knowledge
     if move:
+        # Place the mines around the first move, so that it is safe
+        if not revealed:
+            game = Minesweeper(
+                height=HEIGHT, width=WIDTH, mines=MINES, first_click=move
+            )
         if game.is_mine(move):
             lost = True
+            dirty.update(game.mines)
         else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            observations = game.reveal(move)
+            revealed.update(cell for cell, _ in observations)
+            dirty.update(cell for cell, _ in observations)
+            ai.add_knowledge_many(observations)
+
+    # Redraw everything, or only what changed
+    updated = []
+    if redraw:
+        redraw = False
+        status = None
+        dirty = {(i, j) for i in range(HEIGHT) for j in range(WIDTH)}
+        screen.fill(BLACK)
+        for button, label in (
+            (aiButton, aiButtonText),
+            (resetButton, resetButtonText),
+        ):
+            pygame.draw.rect(screen, WHITE, button)
+            screen.blit(label, label.get_rect(center=button.center))
+        updated.append(screen.get_rect())
+
+    for cell in dirty:
+        rect = draw_cell(cell)
+        screen.blit(board, rect.move(board_origin), rect)
+        updated.append(rect.move(board_origin))
+    dirty.clear()
 
-    pygame.display.flip()
+    # Display text
+    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    if text != status:
+        status = text
+        screen.fill(BLACK, statusRect)
+        screen.blit(
+            statusTexts[text],
+            statusTexts[text].get_rect(
+                center=((5 / 6) * width, (2 / 3) * height)
+            ),
+        )
+        updated.append(statusRect)
+
+    pygame.display.update(updated)
+    clock.tick(FPS)
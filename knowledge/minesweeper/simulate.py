@@ -0,0 +1,139 @@
+import argparse
+import os
+import random
+import statistics
+import time
+
+from multiprocessing import Pool
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play_game(seed, height, width, mines, solver="subset"):
+    """
+    Plays one seeded game of Minesweeper with the AI, without a display.
+    The first move is always safe, and revealing a cell with no nearby
+    mines reveals the cells around it, as in the graphical game.
+
+    Returns a tuple (won, moves, latencies) where `latencies` holds the
+    seconds the AI spent on each move: updating its knowledge with the
+    previous result and choosing the move.
+    """
+    random.seed(seed)
+    game = None
+    ai = MinesweeperAI(
+        height=height, width=width, mines=mines, solver=solver
+    )
+
+    safe_cells = height * width - mines
+    latencies = []
+    observations = None
+
+    while True:
+        start = time.perf_counter()
+        if observations is not None:
+            ai.add_knowledge_many(observations)
+            if len(ai.moves_made) == safe_cells:
+                return True, len(latencies), latencies
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        latencies.append(time.perf_counter() - start)
+
+        if game is None:
+            game = Minesweeper(
+                height=height, width=width, mines=mines, first_click=move
+            )
+        if move is None or game.is_mine(move):
+            return False, len(latencies), latencies
+        observations = game.reveal(move)
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of a sorted list of values.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def simulate(
+    games, height, width, mines, seed=0, processes=None, solver="subset"
+):
+    """
+    Plays `games` seeded games across a process pool and returns a dict
+    summarizing the AI's win rate, moves per game and move latencies.
+    """
+    won = 0
+    moves = []
+    latencies = []
+    workers = processes or os.cpu_count() or 1
+    with Pool(processes) as pool:
+        results = pool.starmap(
+            play_game,
+            [
+                (seed + game, height, width, mines, solver)
+                for game in range(games)
+            ],
+            chunksize=max(1, games // (4 * workers)),
+        )
+    for game_won, game_moves, game_latencies in results:
+        won += game_won
+        moves.append(game_moves)
+        latencies.extend(game_latencies)
+    latencies.sort()
+
+    latency_ms = {
+        f"p{p}": percentile(latencies, p) * 1000 for p in (50, 90, 99)
+    }
+    latency_ms["max"] = percentile(latencies, 100) * 1000
+
+    return {
+        "games": games,
+        "win_rate": won / games,
+        "moves_per_game": statistics.mean(moves),
+        "latency_ms": latency_ms,
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games with the AI, without a display."
+    )
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument(
+        "--solver", choices=["subset", "linear"], default="subset"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = simulate(
+        args.games,
+        args.height,
+        args.width,
+        args.mines,
+        seed=args.seed,
+        processes=args.processes,
+        solver=args.solver,
+    )
+    elapsed = time.perf_counter() - start
+
+    # Print results
+    print(f"{args.games} games on {args.height}x{args.width}, "
+          f"{args.mines} mines, {args.solver} solver, in {elapsed:.2f}s")
+    print(f"  Win rate: {report['win_rate']:.2%}")
+    print(f"  Moves per game: {report['moves_per_game']:.1f}")
+    print("  Move latency (ms):")
+    for name, value in report["latency_ms"].items():
+        print(f"    {name}: {value:.3f}")
+
+
+if __name__ == "__main__":
+    main()
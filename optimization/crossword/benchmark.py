@@ -0,0 +1,174 @@
+import argparse
+import csv
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from crossword import Crossword
+from generate import CrosswordCreator, SearchLimitReached
+
+# Columns of the report, in order
+FIELDS = [
+    "structure", "words", "variables", "status", "seconds",
+    "nodes", "backtracks", "revisions", "peak_kib",
+]
+
+
+def random_structure(height, width, density=0.2, seed=None):
+    """
+    Return a random crossword structure as a list of rows, with "#" for
+    blocks and "_" for open cells. Each cell is a block with probability
+    `density`, and blocks are placed symmetrically, so that the grid looks
+    the same turned upside down.
+    """
+    rng = random.Random(seed)
+    grid = [["_"] * width for _ in range(height)]
+    for i in range(height):
+        for j in range(width):
+            # Decide each pair of opposite cells once, from its first cell
+            if (i, j) <= (height - 1 - i, width - 1 - j):
+                if rng.random() < density:
+                    grid[i][j] = "#"
+                    grid[height - 1 - i][width - 1 - j] = "#"
+    return ["".join(row) for row in grid]
+
+
+def write_structure(rows, filename):
+    """
+    Write a structure made by `random_structure` to a file.
+    """
+    with open(filename, "w") as f:
+        for row in rows:
+            f.write(row + "\n")
+
+
+def solve(creator, time_limit=None):
+    """
+    Solve a crossword, giving up after `time_limit` seconds.
+
+    Return "solved", "unsolvable" or "timeout".
+    """
+    stop = None
+    if time_limit is not None:
+        deadline = time.perf_counter() + time_limit
+        stop = lambda: time.perf_counter() > deadline
+    try:
+        assignment = creator.solve(stop)
+    except SearchLimitReached:
+        return "timeout"
+    return "unsolvable" if assignment is None else "solved"
+
+
+def run_case(structure, words, time_limit=None):
+    """
+    Solve one crossword and return a dict of its results.
+
+    The time covers only the search. Peak memory, including loading the
+    words, is measured in a second, traced run, since tracing slows the
+    search down.
+    """
+    creator = CrosswordCreator(Crossword(structure, words))
+    start = time.perf_counter()
+    status = solve(creator, time_limit)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        solve(CrosswordCreator(Crossword(structure, words)), time_limit)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "structure": structure,
+        "words": words,
+        "variables": len(creator.crossword.variables),
+        "status": status,
+        "seconds": round(seconds, 6),
+        "nodes": creator.nodes,
+        "backtracks": creator.backtracks,
+        "revisions": creator.revisions,
+        "peak_kib": peak // 1024,
+    }
+
+
+def benchmark(structures, vocabularies, time_limit=None):
+    """
+    Solve every structure with every vocabulary, and return a list of the
+    results, one dict per pair.
+    """
+    return [
+        run_case(structure, words, time_limit)
+        for structure in structures
+        for words in vocabularies
+    ]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Time the crossword solver on structures and word lists."
+    )
+    parser.add_argument("structures", nargs="*", help="structure files")
+    parser.add_argument(
+        "-w", "--words", nargs="+", default=["data/words2.txt"],
+        help="word files",
+    )
+    parser.add_argument(
+        "--random", type=int, default=0, help="random structures to add"
+    )
+    parser.add_argument("--height", type=int, default=9)
+    parser.add_argument("--width", type=int, default=9)
+    parser.add_argument("--density", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--dir", default="structures", help="directory for random structures"
+    )
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--json", help="file to write the report to")
+    parser.add_argument("--csv", help="file to write the report to")
+    args = parser.parse_args()
+
+    # Generate random structures, saved so that results can be reproduced
+    structures = list(args.structures)
+    if args.random:
+        os.makedirs(args.dir, exist_ok=True)
+    for k in range(args.random):
+        filename = os.path.join(
+            args.dir,
+            f"random{args.height}x{args.width}-{args.seed + k}.txt",
+        )
+        write_structure(
+            random_structure(
+                args.height, args.width, args.density, args.seed + k
+            ),
+            filename,
+        )
+        structures.append(filename)
+    if not structures:
+        parser.error("no structures given; pass files or use --random")
+
+    results = benchmark(structures, args.words, args.time_limit)
+
+    # Print results
+    for result in results:
+        print(f"{result['structure']} with {result['words']}: "
+              f"{result['status']} in {result['seconds']:.3f}s, "
+              f"{result['nodes']} nodes, {result['backtracks']} backtracks, "
+              f"{result['revisions']} revisions, {result['peak_kib']} KiB")
+
+    # Write report
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,8 @@
+import sys
+
+from collections.abc import Set
+
+
 class Variable:
 
     ACROSS = "across"
@@ -37,6 +42,103 @@ class Variable:
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+class WordIndex(Set):
+
+    def __init__(self, words):
+        """
+        Index a vocabulary by word length and by letter at each position.
+
+        Each word is stored once, interned, in the sorted table of words of
+        its length, and numbered by its place there. Sets of words of one
+        length are bitsets over those numbers: bit k is set if
+        `self.tables[length][k]` is included. The index is itself a
+        read-only set of its words.
+        """
+        # Maps length to the sorted words of that length
+        self.tables = dict()
+        for word in set(words):
+            if word:
+                self.tables.setdefault(len(word), []).append(sys.intern(word))
+
+        # Maps each word to its number within its length's table
+        self.ids = dict()
+
+        # Maps length to the bitset of all words of that length
+        self.lengths = dict()
+
+        # Maps (length, position) to a dict from letter to the words of
+        # that length with that letter at that position
+        self.letters = dict()
+
+        for length, table in self.tables.items():
+            table.sort()
+            self.lengths[length] = (1 << len(table)) - 1
+
+            # Set bits in byte arrays, converted to ints once at the end, so
+            # that building each bitset takes linear time
+            bitmaps = [dict() for _ in range(length)]
+            size = (len(table) + 7) // 8
+            for k, word in enumerate(table):
+                self.ids[word] = k
+                for position, letter in enumerate(word):
+                    bitmap = bitmaps[position].get(letter)
+                    if bitmap is None:
+                        bitmap = bitmaps[position][letter] = bytearray(size)
+                    bitmap[k >> 3] |= 1 << (k & 7)
+            for position, letters in enumerate(bitmaps):
+                self.letters[length, position] = {
+                    letter: int.from_bytes(bitmap, "little")
+                    for letter, bitmap in letters.items()
+                }
+
+    def __contains__(self, word):
+        return word in self.ids
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def matching(self, length, letters=None):
+        """
+        Return the bitset of words of `length` with, for each
+        position: letter pair in `letters`, that letter at that position.
+        """
+        mask = self.lengths.get(length, 0)
+        for position, letter in (letters or dict()).items():
+            mask &= self.letters.get((length, position), dict()).get(letter, 0)
+        return mask
+
+    def match(self, pattern):
+        """
+        Return the words matching `pattern`, where "_" matches any letter;
+        e.g. "_A_T_" gives the 5-letter words with A second and T fourth.
+        """
+        letters = {k: c for k, c in enumerate(pattern) if c != "_"}
+        length = len(pattern)
+        return self.mask_words(self.matching(length, letters), length)
+
+    def mask_words(self, mask, length):
+        """
+        Return the words of `length` whose bits are set in `mask`.
+        """
+        table = self.tables.get(length, [])
+        words = []
+        while mask:
+            low = mask & -mask
+            words.append(table[low.bit_length() - 1])
+            mask ^= low
+        return words
+
+
+class Overlaps(dict):
+    """Overlaps between pairs of variables, None for pairs not stored."""
+
+    def __missing__(self, key):
+        return None
+
+
 class Crossword:
 
     def __init__(self, structure_file, words_file):
@@ -59,9 +161,11 @@ class Crossword:
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
+        # Save vocabulary list, indexed for lookups by length and letters;
+        # the index also serves as the set of words
         with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+            self.index = WordIndex(line.rstrip("\r\n").upper() for line in f)
+        self.words = self.index
 
         # Determine variable set
         self.variables = set()
@@ -104,23 +208,27 @@ class Crossword:
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection),
-                    )
+        # Only overlapping pairs are stored, and found through the variables
+        # covering each cell rather than by comparing every pair.
+        cell_variables = dict()
+        for var in self.variables:
+            for k, cell in enumerate(var.cells):
+                cell_variables.setdefault(cell, []).append((var, k))
+
+        self.overlaps = Overlaps()
+        self._neighbors = {var: set() for var in self.variables}
+        for covering in cell_variables.values():
+            for v1, k1 in covering:
+                for v2, k2 in covering:
+                    if v1 == v2:
+                        continue
+                    self.overlaps[v1, v2] = (k1, k2)
+                    self._neighbors[v1].add(v2)
+        self._neighbors = {
+            var: frozenset(neighbors)
+            for var, neighbors in self._neighbors.items()
+        }
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(v for v in self.variables if v != var and self.overlaps[v, var])
+        return self._neighbors[var]
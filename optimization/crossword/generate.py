@@ -1,7 +1,26 @@
-import sys
-
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from contextlib import contextmanager
 from crossword import *
-from typing import Dict, List, Tuple
+from render import grid_svg, image_renderer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Nodes allowed in the first randomized search of a portfolio worker; each
+# restart doubles the allowance
+RESTART_NODES = 100
+
+# Set in portfolio workers when another worker has finished
+_stop = None
+
+
+class SearchLimitReached(Exception):
+    """Raised to abandon a search that used up its node allowance."""
 
 
 class CrosswordCreator:
@@ -9,12 +28,59 @@ class CrosswordCreator:
     def __init__(self, crossword: Crossword):
         """
         Create new CSP crossword generate.
+
+        Domains are bitsets over the crossword's word index: bit k of
+        `self.domains[var]` is set if `self.index.tables[var.length][k]`
+        may still be assigned to `var`. The vocabulary is shared, so each
+        domain costs one bit per word of its variable's length.
         """
         self.crossword = crossword
-        self.domains = {
-            var: self.crossword.words.copy() for var in self.crossword.variables
+        self.index = self.crossword.index
+
+        self.domains = self.initial_domains()
+
+        # Words placed by the current search, kept in step with backtrack
+        self.used_words = set()
+
+        # Search statistics: assignments tried, values undone and arcs
+        # revised
+        self.nodes = 0
+        self.backtracks = 0
+        self.revisions = 0
+
+        # Maps each arc (x, y) to the last support found in the domain of y
+        # for each letter of x at their overlap; see `revise`
+        self.supports = dict()
+
+        # Randomized searches break ties with `self.random`, and give up
+        # after `self.node_limit` nodes or once `self.stop()` returns True;
+        # these are only set for the length of a search, by `search_settings`
+        self.random = None
+        self.node_limit = None
+        self.stop = None
+
+        # Optional word scores; higher scoring words are tried first
+        self.scores = None
+
+        # Node- and arc-consistent domains, computed once by `prepare`
+        self.prepared_domains = None
+
+    def initial_domains(self) -> Dict[Variable, int]:
+        """
+        Return every variable's domain before any search: a domain can only
+        hold words of its variable's length, so it starts as all of those.
+        """
+        return {
+            var: self.index.matching(var.length)
+            for var in self.crossword.variables
         }
 
+    def domain_words(self, var: Variable) -> List[str]:
+        """
+        Return the words left in the domain of `var`.
+        """
+        return self.index.mask_words(self.domains[var], var.length)
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -35,69 +101,220 @@ class CrosswordCreator:
         """
         Print crossword assignment to the terminal.
         """
+        print(self.grid_text(assignment), end="")
+
+    def grid_text(self, assignment):
+        """
+        Return crossword assignment as text, one line per row.
+        """
         letters = self.letter_grid(assignment)
+        lines = []
         for i in range(self.crossword.height):
+            line = ""
             for j in range(self.crossword.width):
                 if self.crossword.structure[i][j]:
-                    print(letters[i][j] or " ", end="")
+                    line += letters[i][j] or " "
                 else:
-                    print("█", end="")
-            print()
+                    line += "█"
+            lines.append(line + "\n")
+        return "".join(lines)
 
     def save(self, assignment, filename):
         """
-        Save crossword assignment to an image file.
+        Save crossword assignment to a file: as text for a ".txt" file, as
+        SVG for a ".svg" file, and as an image otherwise.
         """
-        from PIL import Image, ImageDraw, ImageFont
-
-        cell_size = 100
-        cell_border = 2
-        interior_size = cell_size - 2 * cell_border
         letters = self.letter_grid(assignment)
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.crossword.width * cell_size, self.crossword.height * cell_size),
-            "black",
+        if filename.endswith(".txt"):
+            with open(filename, "w") as f:
+                f.write(self.grid_text(assignment))
+        elif filename.endswith(".svg"):
+            with open(filename, "w") as f:
+                f.write(grid_svg(self.crossword.structure, letters))
+        else:
+            image_renderer().save(self.crossword.structure, letters, filename)
+
+    def save_many(self, assignments, filenames, workers=None):
+        """
+        Save many crossword assignments to image files, rendering them in a
+        pool of threads.
+        """
+        return image_renderer().save_many(
+            [
+                (self.crossword.structure, self.letter_grid(assignment), filename)
+                for assignment, filename in zip(assignments, filenames)
+            ],
+            workers,
         )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 80)
-        draw = ImageDraw.Draw(img)
-
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
 
-                rect = [
-                    (j * cell_size + cell_border, i * cell_size + cell_border),
-                    (
-                        (j + 1) * cell_size - cell_border,
-                        (i + 1) * cell_size - cell_border,
-                    ),
-                ]
-                if self.crossword.structure[i][j]:
-                    draw.rectangle(rect, fill="white")
-                    if letters[i][j]:
-                        _, _, w, h = draw.textbbox((0, 0), letters[i][j], font=font)
-                        draw.text(
-                            (
-                                rect[0][0] + ((interior_size - w) / 2),
-                                rect[0][1] + ((interior_size - h) / 2) - 10,
-                            ),
-                            letters[i][j],
-                            fill="black",
-                            font=font,
-                        )
-
-        img.save(filename)
-
-    def solve(self):
+    @contextmanager
+    def search_settings(self, rng=None, stop=None, scores=None):
+        """
+        Search with the given random number generator, stop check and word
+        scores, and no node limit, within the `with` block; then put back
+        the settings there were before.
+        """
+        saved = (self.random, self.node_limit, self.stop, self.scores)
+        self.random = rng
+        self.node_limit = None
+        self.stop = stop
+        self.scores = scores
+        try:
+            yield
+        finally:
+            self.random, self.node_limit, self.stop, self.scores = saved
+
+    def solve(self, stop=None):
         """
         Enforce node and arc consistency, and then solve the CSP.
+
+        The search is always the deterministic one. If `stop` is given, it
+        is called at each node, and the search raises SearchLimitReached
+        once it returns True.
         """
-        self.enforce_node_consistency()
+        with self.search_settings(stop=stop):
+            self.enforce_node_consistency()
+
+            self.ac3()
+            self.used_words = set()
+            return self.backtrack(dict())
 
-        self.ac3()
-        return self.backtrack(dict())
+    def prepare(self) -> bool:
+        """
+        Enforce node and arc consistency once, keeping the resulting
+        domains in `self.prepared_domains` for later searches to start from.
+        The domains are rebuilt from the word index first, so whatever an
+        earlier `solve` left in `self.domains` is ignored.
+
+        Return False if some domain ends up empty.
+        """
+        if self.prepared_domains is None:
+            self.domains = self.initial_domains()
+            self.enforce_node_consistency()
+            self.ac3()
+            self.prepared_domains = self.domains.copy()
+        return all(self.prepared_domains.values())
+
+    def restart_search(
+        self,
+        rng: Optional[random.Random] = None,
+        stop: Optional[Callable[[], bool]] = None,
+        scores: Optional[Dict[str, float]] = None,
+    ) -> Tuple[str, Optional[Dict[Variable, str]]]:
+        """
+        Search from the prepared domains. A randomized search (one given a
+        random number generator `rng`) restarts with twice the node
+        allowance whenever it uses its allowance up. If `scores` maps words
+        to scores, higher scoring words are tried first.
+
+        Return ("solved", assignment) or ("unsolvable", None) once a search
+        completes, or ("stopped", None) if `stop()` returns True first.
+        The search settings and domains are put back afterwards, so a later
+        `solve` runs the plain deterministic search.
+        """
+        if not self.prepare():
+            return "unsolvable", None
+
+        allowance = RESTART_NODES
+        with self.search_settings(rng, stop, scores):
+            try:
+                while self.stop is None or not self.stop():
+                    self.domains = self.prepared_domains.copy()
+                    self.used_words = set()
+                    if self.random is not None:
+                        self.node_limit = self.nodes + allowance
+                    try:
+                        assignment = self.backtrack(dict())
+                    except SearchLimitReached:
+                        allowance *= 2
+                        continue
+                    if assignment is None:
+                        return "unsolvable", None
+                    return "solved", assignment
+            finally:
+                # Leave the domains as prepared, not as the search left them
+                self.domains = self.prepared_domains.copy()
+                self.used_words = set()
+        return "stopped", None
+
+    def fills(
+        self,
+        count: int,
+        seed: int = 0,
+        scores: Optional[Dict[str, float]] = None,
+        attempts: Optional[int] = None,
+    ):
+        """
+        Yield up to `count` distinct complete assignments, each found by a
+        randomized search from the same prepared domains.
+
+        If `scores` maps words to scores, higher scoring words are tried
+        first. Stop early if the crossword has no solution, or after
+        `attempts` searches (ten per fill by default) that found repeats.
+
+        Each search puts back the creator's settings and prepared domains
+        when it finishes, so later searches are unaffected by these.
+        """
+        attempts = attempts if attempts is not None else 10 * count
+        found = set()
+        for attempt in range(attempts):
+            if len(found) == count:
+                return
+            status, assignment = self.restart_search(
+                random.Random(seed + attempt), scores=scores
+            )
+            if status != "solved":
+                return
+            key = frozenset(assignment.items())
+            if key not in found:
+                found.add(key)
+                yield dict(assignment)
+
+    def solve_portfolio(
+        self,
+        workers: Optional[int] = None,
+        time_limit: Optional[float] = None,
+        seed: int = 0,
+    ) -> Optional[Dict[Variable, str]]:
+        """
+        Solve the CSP with several searches in parallel, and return the
+        first complete assignment found. One search is the deterministic
+        one `solve` runs; the others are randomized and restart with a
+        larger node allowance whenever theirs runs out.
+
+        Return None if there is no solution, or none was found within
+        `time_limit` seconds.
+        """
+        workers = workers or os.cpu_count() or 1
+        deadline = None if time_limit is None else time.time() + time_limit
+        stop = multiprocessing.Event()
+
+        with ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(stop,)
+        ) as executor:
+            futures = [
+                executor.submit(
+                    solve_with_restarts,
+                    self.crossword,
+                    None if k == 0 else seed + k,
+                    deadline,
+                )
+                for k in range(workers)
+            ]
+            try:
+                for future in as_completed(futures, timeout=time_limit):
+                    status, assignment = future.result()
+                    # A search that ran to completion settles the question.
+                    if status != "stopped":
+                        return assignment
+            except TimeoutError:
+                pass
+            finally:
+                # Tell the remaining searches to give up.
+                stop.set()
+                for future in futures:
+                    future.cancel()
+        return None
 
     def enforce_node_consistency(self) -> None:
         """
@@ -106,11 +323,7 @@ class CrosswordCreator:
          constraints; in this case, the length of the word.)
         """
         for var in self.domains:
-            inconsistent_words = set()
-            for word in self.domains[var]:
-                if len(word) != var.length:
-                    inconsistent_words.add(word)
-            self.domains[var].difference_update(inconsistent_words)
+            self.domains[var] &= self.index.matching(var.length)
 
     def revise(self, x: Variable, y: Variable) -> bool:
         """
@@ -120,7 +333,14 @@ class CrosswordCreator:
 
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
+
+        Values of `x` with the same letter where `x` meets `y` have the same
+        supports, so a support is looked for once per letter. The last
+        support found is remembered in `self.supports` and tried first next
+        time; it needs no undoing on backtrack, since it is only trusted
+        while it is still in the domain of `y`.
         """
+        self.revisions += 1
         revised = False
         overlap = self.crossword.overlaps[x, y]
         # There is nothing to revise.
@@ -129,18 +349,26 @@ class CrosswordCreator:
 
         # (i, j), where v1's ith character overlaps v2's jth character.
         i, j = overlap
-        y_letters = set()
-        inconsistent_words = set()
-        for word in self.domains[y]:
-            y_letters.add(word[j])
-        for word in self.domains[x]:
-            if word[i] not in y_letters:
-                inconsistent_words.add(word)
+        x_domain = self.domains[x]
+        y_domain = self.domains[y]
+        y_letters = self.index.letters.get((y.length, j), {})
+        supports = self.supports.setdefault((x, y), dict())
+        unsupported = 0
+        for letter, mask in self.index.letters.get((x.length, i), {}).items():
+            support = supports.get(letter)
+            if support is not None and y_domain >> support & 1:
+                continue
+            # Look for a word of y with this letter at j.
+            candidates = y_letters.get(letter, 0) & y_domain
+            if candidates:
+                supports[letter] = (candidates & -candidates).bit_length() - 1
+            else:
+                unsupported |= mask
 
         # Revise the domain
-        if len(inconsistent_words) > 0:
+        if x_domain & unsupported:
             revised = True
-            self.domains[x].difference_update(inconsistent_words)
+            self.domains[x] = x_domain & ~unsupported
         return revised
 
     def ac3(self, arcs: List[Tuple[Variable, Variable]] = None) -> bool:
@@ -151,20 +379,29 @@ class CrosswordCreator:
 
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
+
+        An arc already waiting in the queue is not queued again.
         """
-        queue = (
-            arcs
-            if arcs
-            else [(x, y) for (x, y), flag in self.crossword.overlaps.items() if flag]
-        )
-        while len(queue) > 0:
-            x, y = queue.pop()
+        if arcs is None:
+            arcs = [
+                (x, y) for (x, y), flag in self.crossword.overlaps.items() if flag
+            ]
+        queue = deque()
+        queued = set()
+        for arc in arcs:
+            if arc not in queued:
+                queue.append(arc)
+                queued.add(arc)
+        while queue:
+            x, y = queue.popleft()
+            queued.discard((x, y))
             if self.revise(x, y):
-                if len(self.domains[x]) == 0:
+                if self.domains[x] == 0:
                     return False
                 for var in self.crossword.neighbors(x):
-                    if var != y:
+                    if var != y and (var, x) not in queued:
                         queue.append((var, x))
+                        queued.add((var, x))
         return True
 
     def assignment_complete(self, assignment: Dict[Variable, str]) -> bool:
@@ -213,32 +450,64 @@ class CrosswordCreator:
             seen_values.add(word)
         return True
 
+    def consistent_value(
+        self, var: Variable, value: str, assignment: Dict[Variable, str]
+    ) -> bool:
+        """
+        Return True if assigning `value` to `var` keeps a consistent
+        `assignment` consistent: the word is not already used and agrees
+        with the words assigned to the neighbors of `var`. Only `var` is
+        checked, so the cost does not grow with the assignment.
+        """
+        if value in self.used_words or len(value) != var.length:
+            return False
+        for neighbor in self.crossword.neighbors(var):
+            word = assignment.get(neighbor)
+            if word is not None:
+                i, j = self.crossword.overlaps[var, neighbor]
+                if value[i] != word[j]:
+                    return False
+        return True
+
     def order_domain_values(
         self, var: Variable, assignment: Dict[Variable, str]
-    ) -> str:
+    ) -> List[str]:
         """
         Return a list of values in the domain of `var`, in order by
         the number of values they rule out for neighboring variables.
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        neighbors = self.crossword.neighbors(var)
+        # For each unassigned neighbor, count how many of its values have
+        # each letter where it overlaps `var`. A value of `var` rules out
+        # every neighbor value without its letter at the overlap.
+        histograms = []
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                continue
+            i, j = self.crossword.overlaps[var, neighbor]
+            domain = self.domains[neighbor]
+            letters = self.index.letters.get((neighbor.length, j), dict())
+            histogram = {
+                letter: (mask & domain).bit_count()
+                for letter, mask in letters.items()
+            }
+            histograms.append((i, domain.bit_count(), histogram))
+
         values = dict()
-        for val in self.domains[var]:
-            values[val] = 0
-            for neighbor in neighbors:
-                if val in self.domains[neighbor]:
-                    values[val] += 1
+        for val in self.domain_words(var):
+            values[val] = sum(
+                size - histogram.get(val[i], 0)
+                for i, size, histogram in histograms
+            )
+        if self.scores is not None:
+            for val in values:
+                values[val] = (-self.scores.get(val, 0), values[val])
+        if self.random is not None:
+            tiebreak = {val: self.random.random() for val in values}
+            return sorted(values, key=lambda val: (values[val], tiebreak[val]))
         return sorted(values, key=values.get)
 
-        # take list of variables
-        # take all neighbours
-
-        # for each variable, check each neighbor and count it's presence
-        # return least presence
-        # TODO implement, this is first slice
-        return list(self.domains[var])
-
     def select_unassigned_variable(self, assignment: Dict[Variable, str]) -> Variable:
         """
         Return an unassigned variable not already part of `assignment`.
@@ -247,10 +516,14 @@ class CrosswordCreator:
         degree. If there is a tie, any of the tied variables are acceptable
         return values.
         """
-        # TODO implement, this is first slice
-        for var in self.domains:
-            if var not in assignment:
-                return var
+        return min(
+            (var for var in self.domains if var not in assignment),
+            key=lambda var: (
+                self.domains[var].bit_count(),
+                -len(self.crossword.neighbors(var)),
+                self.random.random() if self.random is not None else 0,
+            ),
+        )
 
     def backtrack(self, assignment):
         """
@@ -260,43 +533,163 @@ class CrosswordCreator:
         `assignment` is a mapping from variables (keys) to words (values).
 
         If no assignment is possible, return None.
+
+        After each assignment, arc consistency is restored for the arcs
+        into the assigned variable, and the domains are put back if the
+        assignment is undone. Only the new value is checked for
+        consistency, against `self.used_words` and the assigned neighbors.
         """
-        if self.assignment_complete(assignment):
+        # Every value placed was checked, so a full assignment is complete.
+        if len(assignment) == len(self.domains):
             return assignment
         var = self.select_unassigned_variable(assignment)
         for value in self.order_domain_values(var, assignment):
-            assignment[var] = value
-            if self.consistent(assignment):
-                result = self.backtrack(assignment)
-                if result:
-                    return result
-            del assignment[var]
+            self.nodes += 1
+            if self.node_limit is not None and self.nodes > self.node_limit:
+                raise SearchLimitReached
+            if self.stop is not None and self.stop():
+                raise SearchLimitReached
+            if self.consistent_value(var, value, assignment):
+                assignment[var] = value
+                self.used_words.add(value)
+                saved = self.domains.copy()
+                self.domains[var] = 1 << self.index.ids[value]
+                arcs = [
+                    (neighbor, var)
+                    for neighbor in self.crossword.neighbors(var)
+                    if neighbor not in assignment
+                ]
+                if self.ac3(arcs):
+                    result = self.backtrack(assignment)
+                    if result:
+                        return result
+                self.domains = saved
+                self.used_words.discard(value)
+                del assignment[var]
+            self.backtracks += 1
         return None
 
 
-def main():
+def _init_worker(stop):
+    """
+    Keep the event set when a portfolio search should give up.
+    """
+    global _stop
+    _stop = stop
+
+
+def solve_with_restarts(
+    crossword: Crossword,
+    seed: Optional[int],
+    deadline: Optional[float] = None,
+) -> Tuple[str, Optional[Dict[Variable, str]]]:
+    """
+    Solve `crossword` with randomized searches, restarting each one that
+    uses up its node allowance with twice the allowance. With a `seed` of
+    None, run a single deterministic search without restarts instead.
+
+    Return ("solved", assignment) or ("unsolvable", None) once a search
+    completes, or ("stopped", None) if `deadline` passes or the portfolio
+    is stopped first.
+    """
+    creator = CrosswordCreator(crossword)
+    rng = random.Random(seed) if seed is not None else None
+    return creator.restart_search(
+        rng,
+        lambda: (
+            (_stop is not None and _stop.is_set())
+            or (deadline is not None and time.time() > deadline)
+        ),
+    )
+
+
+def load_scores(filename: str) -> Dict[str, float]:
+    """
+    Load word scores from a file with one word and its score per line.
+    """
+    scores = dict()
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                word, score = line.rsplit(maxsplit=1)
+                scores[word.upper()] = float(score)
+    return scores
 
-    # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+
+def main():
 
     # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    parser = argparse.ArgumentParser(
+        description="Generate a crossword, or with --count, many of them."
+    )
+    parser.add_argument("structure")
+    parser.add_argument("words")
+    parser.add_argument(
+        "output", nargs="?", help="file to save, as .png, .svg or .txt"
+    )
+    parser.add_argument("--count", type=int, help="distinct fills to write")
+    parser.add_argument("--out", default=".", help="directory for fills")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scores", help="file of word and score lines")
+    parser.add_argument(
+        "--portfolio", action="store_true",
+        help="run several searches in parallel and take the first fill",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="searches to run with --portfolio"
+    )
+    parser.add_argument(
+        "--time-limit", type=float, help="seconds to search with --portfolio"
+    )
+    parser.add_argument(
+        "--format", choices=["txt", "svg", "png"], default="txt",
+        help="file format for fills",
+    )
+    args = parser.parse_args()
+    if not args.portfolio and (args.workers or args.time_limit):
+        parser.error("--workers and --time-limit need --portfolio")
 
     # Generate crossword
-    crossword = Crossword(structure, words)
+    crossword = Crossword(args.structure, args.words)
     creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+
+    # Write many distinct fills, each to its own file. Text and SVG files
+    # are written as fills are found; images are rendered together at the
+    # end, in a pool of threads.
+    if args.count:
+        scores = load_scores(args.scores) if args.scores else None
+        os.makedirs(args.out, exist_ok=True)
+        images = []
+        written = 0
+        for assignment in creator.fills(args.count, args.seed, scores):
+            filename = os.path.join(args.out, f"fill{written}.{args.format}")
+            if args.format == "png":
+                images.append((assignment, filename))
+            else:
+                creator.save(assignment, filename)
+                print(filename)
+            written += 1
+        if images:
+            for filename in creator.save_many(*zip(*images)):
+                print(filename)
+        if written < args.count:
+            print(f"Only {written} distinct fills found.")
+        return
+
+    if args.portfolio:
+        assignment = creator.solve_portfolio(
+            args.workers, args.time_limit, args.seed
+        )
+    else:
+        assignment = creator.solve()
 
     # Print result
     if assignment is None:
         print("No solution.")
     else:
         creator.print(assignment)
-        if output:
-            creator.save(assignment, output)
+        if args.output:
+            creator.save(assignment, args.output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+FONT = "assets/fonts/OpenSans-Regular.ttf"
+FONT_SIZE = 80
+CELL_SIZE = 100
+CELL_BORDER = 2
+
+
+class ImageRenderer:
+    """
+    Draws filled crosswords as images. The font is loaded once, and each
+    letter is drawn once onto a cell-sized tile that is then pasted into
+    every cell holding it.
+
+    PIL is imported here rather than at module level, so that runs which
+    never draw an image do not pay for importing it.
+    """
+
+    def __init__(self, font=FONT, font_size=FONT_SIZE, cell_size=CELL_SIZE,
+                 cell_border=CELL_BORDER):
+        from PIL import Image, ImageDraw, ImageFont
+
+        self.Image = Image
+        self.ImageDraw = ImageDraw
+        self.font = ImageFont.truetype(font, font_size)
+        self.cell_size = cell_size
+        self.cell_border = cell_border
+
+        # Open cells are squares from one border to the other, inclusive
+        self.interior_size = cell_size - 2 * cell_border
+        self.blank = Image.new("RGBA", (self.interior_size + 1,) * 2, "white")
+        self.glyphs = dict()
+
+    def glyph(self, letter):
+        """
+        Return the tile for an open cell holding `letter`.
+        """
+        tile = self.glyphs.get(letter)
+        if tile is None:
+            tile = self.blank.copy()
+            draw = self.ImageDraw.Draw(tile)
+            _, _, w, h = draw.textbbox((0, 0), letter, font=self.font)
+            draw.text(
+                (
+                    (self.interior_size - w) / 2,
+                    (self.interior_size - h) / 2 - 10,
+                ),
+                letter,
+                fill="black",
+                font=self.font,
+            )
+            self.glyphs[letter] = tile
+        return tile
+
+    def render(self, structure, letters):
+        """
+        Return an image of a crossword, given its structure and the letter
+        in each cell (None where there is none).
+        """
+        height = len(structure)
+        width = len(structure[0]) if height else 0
+        img = self.Image.new(
+            "RGBA", (width * self.cell_size, height * self.cell_size), "black"
+        )
+        for i in range(height):
+            for j in range(width):
+                if not structure[i][j]:
+                    continue
+                if letters[i][j]:
+                    tile = self.glyph(letters[i][j])
+                else:
+                    tile = self.blank
+                img.paste(
+                    tile,
+                    (
+                        j * self.cell_size + self.cell_border,
+                        i * self.cell_size + self.cell_border,
+                    ),
+                )
+        return img
+
+    def save(self, structure, letters, filename):
+        """
+        Save an image of a crossword to a file.
+        """
+        self.render(structure, letters).save(filename)
+
+    def save_many(self, grids, workers=None):
+        """
+        Save many crosswords, given as (structure, letters, filename)
+        tuples, across a pool of threads; PIL releases the GIL while it
+        encodes images. Return the filenames in order.
+        """
+        # Draw every glyph first, so that threads only read the cache
+        for _, letters, _ in grids:
+            for row in letters:
+                for letter in row:
+                    if letter:
+                        self.glyph(letter)
+
+        with ThreadPoolExecutor(workers) as executor:
+            futures = [
+                executor.submit(self.save, structure, letters, filename)
+                for structure, letters, filename in grids
+            ]
+            for future in futures:
+                future.result()
+        return [filename for _, _, filename in grids]
+
+
+@lru_cache(maxsize=None)
+def image_renderer():
+    """
+    Return the shared image renderer, creating it on first use.
+    """
+    return ImageRenderer()
+
+
+def grid_svg(structure, letters, cell_size=CELL_SIZE, cell_border=CELL_BORDER):
+    """
+    Return a crossword as an SVG document, drawn like the images but
+    without needing PIL.
+    """
+    height = len(structure)
+    width = len(structure[0]) if height else 0
+    interior_size = cell_size - 2 * cell_border
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{width * cell_size}" height="{height * cell_size}">',
+        '<rect width="100%" height="100%" fill="black"/>',
+    ]
+    for i in range(height):
+        for j in range(width):
+            if structure[i][j]:
+                x = j * cell_size + cell_border
+                y = i * cell_size + cell_border
+                lines.append(
+                    f'<rect x="{x}" y="{y}" width="{interior_size}" '
+                    f'height="{interior_size}" fill="white"/>'
+                )
+                if letters[i][j]:
+                    lines.append(
+                        f'<text x="{x + interior_size / 2}" '
+                        f'y="{y + interior_size / 2}" '
+                        f'font-family="Open Sans, sans-serif" '
+                        f'font-size="{FONT_SIZE}" text-anchor="middle" '
+                        f'dominant-baseline="central">'
+                        f'{escape(letters[i][j])}</text>'
+                    )
+    lines.append("</svg>")
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,7 @@
 from typing import Dict, List, Set, Union
 
 import csv
+import heapq
 import itertools
 import sys
 
@@ -19,45 +20,35 @@ PROBS = {
     "mutation": 0.01,
 }
 
+# Possible numbers of copies of the gene
+GENES = (0, 1, 2)
+
+# Most people allowed in one cluster of the junction tree; a cluster's
+# table has 3 ** size entries
+MAX_CLUSTER_SIZE = 12
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) == 3 and sys.argv[2] == "--enumerate":
+        enumerate_all = True
+    elif len(sys.argv) == 2:
+        enumerate_all = False
+    else:
+        sys.exit("Usage: python heredity.py data.csv [--enumerate]")
     people = load_data(sys.argv[1])
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
-        person: {"gene": {2: 0, 1: 0, 0: 0}, "trait": {True: 0, False: 0}}
-        for person in people
-    }
-
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (
-                people[person]["trait"] is not None
-                and people[person]["trait"] != (person in have_trait)
-            )
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
-
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
+    # Compute gene and trait probabilities for each person, by enumerating
+    # every joint assignment if asked to, or else by exact inference over
+    # the family tree
+    if enumerate_all:
+        probabilities = enumerate_probabilities(people)
+    else:
+        try:
+            probabilities = infer_probabilities(people)
+        except ValueError as e:
+            sys.exit(str(e))
 
     # Print results
     for person in people:
@@ -107,6 +98,28 @@ def powerset(s):
     ]
 
 
+def inheritance_probability(parents: List[int], gene: int) -> float:
+    """
+    The probability a specified gene quantity (0, 1, 2) will occur from two
+    specified parents (each 0, 1, 2).
+
+    args:
+        parents - The mother and father's genes.
+        gene _ The sought after gene.
+    """
+    # The probabilities for passing on genes to children.
+    pass_on = {True: {0: 0.01, 1: 0.5, 2: 0.99}, False: {0: 0.99, 1: 0.5, 2: 0.01}}
+    # The situations where the gene is passed on in a specific fashion.
+    if gene == 0:
+        return pass_on[False][parents[0]] * pass_on[False][parents[1]]
+    elif gene == 1:
+        return (pass_on[False][parents[0]] * pass_on[True][parents[1]]) + (
+            pass_on[True][parents[0]] * pass_on[False][parents[1]]
+        )
+    elif gene == 2:
+        return pass_on[True][parents[0]] * pass_on[True][parents[1]]
+
+
 def joint_probability(
     people: Dict[str, Dict[str, Union[str, bool]]],
     one_gene: Set[str],
@@ -140,27 +153,6 @@ def joint_probability(
         else:
             return 0
 
-    def inheritance_probability(parents: List[int], gene: int) -> float:
-        """
-        The probability a specified gene quantity (0, 1, 2) will occur from two
-        specified parents (each 0, 1, 2).
-
-        args:
-            parents - The mother and father's genes.
-            gene _ The sought after gene.
-        """
-        # The probabilities for passing on genes to children.
-        pass_on = {True: {0: 0.01, 1: 0.5, 2: 0.99}, False: {0: 0.99, 1: 0.5, 2: 0.01}}
-        # The situations where the gene is passed on in a specific fashion.
-        if gene == 0:
-            return pass_on[False][parents[0]] * pass_on[False][parents[1]]
-        elif gene == 1:
-            return (pass_on[False][parents[0]] * pass_on[True][parents[1]]) + (
-                pass_on[True][parents[0]] * pass_on[False][parents[1]]
-            )
-        elif gene == 2:
-            return pass_on[True][parents[0]] * pass_on[True][parents[1]]
-
     def person_probability(person: str, gene: int, trait: bool) -> float:
         """
         The probability of a single person existing in their specified state.
@@ -235,5 +227,249 @@ def normalize(
             traits[trait] /= total
 
 
+def enumerate_probabilities(people):
+    """
+    Return the gene and trait distribution of each person, computed by
+    summing the joint probability of every assignment of genes and traits
+    that agrees with the known traits. This takes time exponential in the
+    number of people.
+    """
+    # Keep track of gene and trait probabilities for each person
+    probabilities = {
+        person: {"gene": {2: 0, 1: 0, 0: 0}, "trait": {True: 0, False: 0}}
+        for person in people
+    }
+
+    # Loop over all sets of people who might have the trait
+    names = set(people)
+    for have_trait in powerset(names):
+
+        # Check if current set of people violates known information
+        fails_evidence = any(
+            (
+                people[person]["trait"] is not None
+                and people[person]["trait"] != (person in have_trait)
+            )
+            for person in names
+        )
+        if fails_evidence:
+            continue
+
+        # Loop over all sets of people who might have the gene
+        for one_gene in powerset(names):
+            for two_genes in powerset(names - one_gene):
+
+                # Update probabilities with new joint probability
+                p = joint_probability(people, one_gene, two_genes, have_trait)
+                update(probabilities, one_gene, two_genes, have_trait, p)
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return probabilities
+
+
+def person_factors(people):
+    """
+    Return the factors of the joint distribution of everyone's genes given
+    the known traits, one per person.
+
+    A factor is a pair (variables, table), where `variables` is a tuple of
+    names and `table` maps each tuple of their gene counts to a number.
+    A person's factor covers the probability of their gene given their
+    parents' genes, times the probability of their trait if it is known.
+    """
+    factors = []
+    for person, data in people.items():
+        mother = data["mother"]
+        father = data["father"]
+        variables = (mother, father, person) if mother and father else (person,)
+        table = dict()
+        for genes in itertools.product(GENES, repeat=len(variables)):
+            gene = genes[-1]
+            if len(variables) == 3:
+                p = inheritance_probability(genes[:2], gene)
+            else:
+                p = PROBS["gene"][gene]
+            if data["trait"] is not None:
+                p *= PROBS["trait"][gene][data["trait"]]
+            table[genes] = p
+        factors.append((variables, table))
+    return factors
+
+
+def multiply(factors, variables):
+    """
+    Return the product of `factors` as a factor over `variables`, which
+    must include every variable of the factors. The product is scaled to
+    sum to 1, so that products over large families do not underflow.
+    """
+    position = {var: k for k, var in enumerate(variables)}
+    lookups = [
+        (table, [position[var] for var in factor_variables])
+        for factor_variables, table in factors
+    ]
+    table = dict()
+    for genes in itertools.product(GENES, repeat=len(variables)):
+        p = 1
+        for factor_table, positions in lookups:
+            p *= factor_table[tuple(genes[k] for k in positions)]
+        table[genes] = p
+
+    total = sum(table.values())
+    for genes in table:
+        table[genes] /= total
+    return tuple(variables), table
+
+
+def marginalize(factor, variables):
+    """
+    Sum `factor` over every variable not in `variables`.
+    """
+    factor_variables, factor_table = factor
+    positions = [factor_variables.index(var) for var in variables]
+    table = dict.fromkeys(itertools.product(GENES, repeat=len(variables)), 0)
+    for genes, p in factor_table.items():
+        table[tuple(genes[k] for k in positions)] += p
+    return tuple(variables), table
+
+
+def elimination_order(people):
+    """
+    Return a list of (person, cluster) pairs giving an order in which to
+    sum people out of the joint distribution, and for each the set of
+    people their factors share when they are summed out.
+
+    Each person is linked to their parents, and the parents to each other.
+    The next person is always the one whose removal adds the fewest new
+    links between the people linked to them.
+    """
+    links = {person: set() for person in people}
+    for person, data in people.items():
+        family = [person, data["mother"], data["father"]]
+        family = [member for member in family if member]
+        for a, b in itertools.combinations(family, 2):
+            links[a].add(b)
+            links[b].add(a)
+
+    def score(person):
+        fill = sum(
+            1
+            for a, b in itertools.combinations(links[person], 2)
+            if b not in links[a]
+        )
+        return fill, len(links[person]), person
+
+    # Keep people in a heap by score. Removing a person only changes the
+    # scores of people within two links, so only those are pushed again,
+    # and entries with out of date scores are skipped.
+    scores = {person: score(person) for person in links}
+    heap = list(scores.values())
+    heapq.heapify(heap)
+
+    order = []
+    while heap:
+        entry = heapq.heappop(heap)
+        person = entry[-1]
+        if scores.get(person) != entry:
+            continue
+        del scores[person]
+        neighbors = links.pop(person)
+        for a in neighbors:
+            links[a] |= neighbors - {a}
+            links[a].discard(person)
+        order.append((person, {person} | neighbors))
+
+        affected = set(neighbors)
+        for a in neighbors:
+            affected |= links[a]
+        for a in affected:
+            scores[a] = score(a)
+            heapq.heappush(heap, scores[a])
+    return order
+
+
+def infer_probabilities(people):
+    """
+    Return the gene and trait distribution of each person, computed exactly
+    by message passing on a junction tree of the family.
+
+    The tree has one cluster per person, formed by summing them out in the
+    order of `elimination_order`, and its size depends on how tangled the
+    family is rather than on how many people are in it. Messages are sent
+    from the leaves up to the roots and back down, after which each
+    cluster holds the distribution of its people given the known traits.
+
+    Raise ValueError if some cluster has more than MAX_CLUSTER_SIZE people.
+    """
+    order = elimination_order(people)
+    largest = max((len(cluster) for _, cluster in order), default=0)
+    if largest > MAX_CLUSTER_SIZE:
+        raise ValueError(
+            f"family too tangled for exact inference: a cluster of "
+            f"{largest} people would need a table of 3 ** {largest} "
+            f"entries (at most {MAX_CLUSTER_SIZE} people allowed)"
+        )
+    position = {person: k for k, (person, _) in enumerate(order)}
+    clusters = [tuple(sorted(cluster)) for _, cluster in order]
+
+    # A cluster's parent is the cluster of the first of its other people to
+    # be summed out; they share those other people, the separator
+    parents = []
+    separators = []
+    for person, cluster in order:
+        separator = tuple(sorted(cluster - {person}))
+        separators.append(separator)
+        parents.append(
+            min((position[other] for other in separator), default=None)
+        )
+    children = [[] for _ in order]
+    for k, parent in enumerate(parents):
+        if parent is not None:
+            children[parent].append(k)
+
+    # Give each factor to the cluster of the first of its people summed out
+    potentials = [[] for _ in order]
+    for factor in person_factors(people):
+        potentials[min(position[var] for var in factor[0])].append(factor)
+
+    # Pass messages up, children before parents
+    up = [None for _ in order]
+    for k in range(len(order)):
+        if parents[k] is not None:
+            incoming = potentials[k] + [up[child] for child in children[k]]
+            up[k] = marginalize(multiply(incoming, clusters[k]), separators[k])
+
+    # Pass messages down, parents before children
+    down = [None for _ in order]
+    for k in reversed(range(len(order))):
+        above = [down[k]] if down[k] is not None else []
+        for child in children[k]:
+            incoming = potentials[k] + above + [
+                up[other] for other in children[k] if other != child
+            ]
+            down[child] = marginalize(
+                multiply(incoming, clusters[k]), separators[child]
+            )
+
+    # Read each person's gene distribution off their cluster
+    probabilities = dict()
+    for k, (person, _) in enumerate(order):
+        incoming = potentials[k] + [up[child] for child in children[k]]
+        if down[k] is not None:
+            incoming.append(down[k])
+        _, genes = marginalize(multiply(incoming, clusters[k]), (person,))
+        gene = {gene: genes[(gene,)] for gene in (2, 1, 0)}
+
+        trait = people[person]["trait"]
+        if trait is None:
+            p = sum(gene[g] * PROBS["trait"][g][True] for g in GENES)
+            traits = {True: p, False: 1 - p}
+        else:
+            traits = {True: float(trait), False: float(not trait)}
+        probabilities[person] = {"gene": gene, "trait": traits}
+
+    return {person: probabilities[person] for person in people}
+
+
 if __name__ == "__main__":
     main()